@@ -1,13 +1,18 @@
 from .client import Pigeon
 import argparse
+import json
+import signal
+import threading
 import yaml
 from functools import partial
 
 
 class Listener:
-    def __init__(self, disp_headers):
+    def __init__(self, disp_headers, one=False):
         self.message_received = False
         self.disp_headers = disp_headers
+        self.one = one
+        self.done = threading.Event()
 
     def callback(self, msg, topic, headers):
         print(f"Recieved message on topic '{topic}':")
@@ -17,6 +22,42 @@ class Listener:
             for key, val in headers.items():
                 print(f"{key}={val}")
         self.message_received = True
+        if self.one:
+            self.done.set()
+
+    def interrupt(self, signum, frame):
+        print("exiting")
+        self.done.set()
+
+
+def load_data_file(path):
+    """Load messages from a file of newline delimited JSON.
+
+    Args:
+        path: The location of the file.
+
+    Returns:
+        A list of the message data to publish.
+
+    Raises:
+        ValueError: If the file cannot be read, or a line is not a JSON object.
+    """
+    messages = []
+    try:
+        with open(path) as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{line_number}:{e.colno}: {e.msg}") from e
+                if not isinstance(data, dict):
+                    raise ValueError(f"{path}:{line_number}: Expected a JSON object.")
+                messages.append(data)
+    except OSError as e:
+        raise ValueError(f"Could not read data file: {e}") from e
+    return messages
 
 
 def main():
@@ -46,6 +87,11 @@ def main():
     parser.add_argument(
         "-d", "--data", type=str, help="The YAML/JSON formatted data to publish."
     )
+    parser.add_argument(
+        "--data-file",
+        type=str,
+        help="A file of newline delimited JSON messages to publish in turn.",
+    )
     parser.add_argument(
         "-s",
         "--subscribe",
@@ -79,35 +125,50 @@ def main():
         print("No action specified.")
         return
 
-    if args.publish and args.data is None:
+    if args.publish and args.data is None and args.data_file is None:
         print("Must also specify data to publish.")
         return
 
-    if args.data and args.publish is None:
+    if (args.data or args.data_file) and args.publish is None:
         print("Most also specify topic to publish data to.")
         return
 
+    file_data = []
+    if args.data_file:
+        try:
+            file_data = load_data_file(args.data_file)
+        except ValueError as e:
+            print(e)
+            return
+
     connection = Pigeon("CLI", args.host, args.port)
     connection.connect(args.username, args.password)
 
-    if args.publish:
-        connection.send(args.publish, **yaml.safe_load(args.data))
-
-    if args.subscribe or args.all:
-        listener = Listener(args.headers)
-
-    if args.all:
-        connection.subscribe_all(listener.callback)
-    else:
-        for topic in args.subscribe:
-            connection.subscribe(topic, listener.callback)
-
-    if args.subscribe or args.all:
-        try:
-            while not (args.one and listener.message_received):
-                pass
-        except KeyboardInterrupt:
-            print("exiting")
+    try:
+        if args.publish and args.data:
+            try:
+                data = json.loads(args.data)
+            except json.JSONDecodeError:
+                data = yaml.safe_load(args.data)
+            connection.send(args.publish, **data)
+
+        for data in file_data:
+            connection.send(args.publish, **data)
+
+        if args.subscribe or args.all:
+            listener = Listener(args.headers, args.one)
+
+        if args.all:
+            connection.subscribe_all(listener.callback)
+        else:
+            for topic in args.subscribe:
+                connection.subscribe(topic, listener.callback)
+
+        if args.subscribe or args.all:
+            signal.signal(signal.SIGINT, listener.interrupt)
+            listener.done.wait()
+    finally:
+        connection.disconnect()
     exit(0)
 
 
@@ -1,9 +1,13 @@
 import logging
 import os
+import queue
+import random
 import socket
+import threading
 import time
+from functools import lru_cache
 from importlib.metadata import entry_points
-from typing import Callable, Dict
+from typing import Callable, Dict, List, Tuple
 
 import stomp
 import stomp.exception
@@ -12,11 +16,26 @@ from stomp.utils import Frame
 
 from . import messages
 from . import exceptions
-from .utils import get_message_hash, call_with_correct_args
+from .utils import get_message_hash, make_adapter
+
+_last_time_ms = (None, None)
 
 
 def get_str_time_ms():
-    return str(int(time.time_ns() / 1e6))
+    global _last_time_ms
+    time_ms = time.time_ns() // 1_000_000
+    last_ms, last_str = _last_time_ms
+    if time_ms == last_ms:
+        return last_str
+    time_str = str(time_ms)
+    # Store both values in one tuple so concurrent callers never see a mismatch.
+    _last_time_ms = (time_ms, time_str)
+    return time_str
+
+
+@lru_cache(maxsize=1)
+def _discover_topics():
+    return [entrypoint.load() for entrypoint in entry_points(group="pigeon.msgs")]
 
 
 class Pigeon:
@@ -41,6 +60,7 @@ class Pigeon:
         port: int = 61616,
         logger: logging.Logger = None,
         load_topics: bool = True,
+        workers: int = 1,
     ):
         """
         Args:
@@ -51,22 +71,29 @@ class Pigeon:
             logger: A Python logger to use. If not provided, a logger will be
                 crated.
             load_topics: If true, load topics from Python entry points.
+            workers: The number of threads used to handle received messages.
+                Messages received on the same topic are always handled in
+                the order they arrive.
         """
         self._service = service
+        self._pid = os.getpid()
+        self._hostname = socket.gethostname().split(".")[0]
+        self._name = f"{self._service}_{self._pid}_{self._hostname}"
         self._connection = stomp.Connection12([(host, port)], heartbeats=(10000, 10000))
-        self._topics = {}
-        self._hashes = {}
+        self._topics: Dict[str, Tuple[Callable, str]] = {}
+        self._dispatch: Dict[str, Callable[[dict, str], None]] = {}
+        self._header_protos: Dict[str, dict] = {}
+        self._callbacks: Dict[str, Callable] = {}
         if load_topics:
             self._load_topics()
-        self._callbacks: Dict[str, Callable] = {}
+        self._queues = [queue.Queue() for _ in range(max(workers, 1))]
+        self._workers: List[threading.Thread] = []
+        self._workers_lock = threading.Lock()
+        self._draining = False
         self._connection.set_listener(
-            "listener", TEMCommsListener(self._handle_message)
+            "listener", TEMCommsListener(self._enqueue_message)
         )
         self._logger = logger if logger is not None else self._configure_logging()
-
-        self._pid = os.getpid()
-        self._hostname = socket.gethostname().split(".")[0]
-        self._name = f"{self._service}_{self._pid}_{self._hostname}"
         self.register_topics(messages.core_topics)
 
     def _announce(self, connected=True):
@@ -96,8 +123,8 @@ class Pigeon:
         return logger
 
     def _load_topics(self):
-        for entrypoint in entry_points(group="pigeon.msgs"):
-            self.register_topics(entrypoint.load())
+        for topics in _discover_topics():
+            self.register_topics(topics)
 
     def register_topic(self, topic: str, msg_class: Callable):
         """Register message definition for a given topic.
@@ -106,8 +133,23 @@ class Pigeon:
             topic: The topic that this message definition applies to.
             msg_class: The Pydantic model definition of the message.
         """
-        self._topics[topic] = msg_class
-        self._hashes[topic] = get_message_hash(msg_class)
+        self._set_topic(topic, msg_class, get_message_hash(msg_class))
+
+    def _set_topic(self, topic: str, msg_class: Callable, msg_hash: str):
+        self._header_protos[topic] = dict(
+            source=self._name,
+            service=self._service,
+            hostname=self._hostname,
+            pid=self._pid,
+            hash=msg_hash,
+        )
+        self._topics[topic] = (msg_class, msg_hash)
+        # Only subscribe, unsubscribe and this method write to _dispatch, so a
+        # message handled concurrently cannot replace a newer closure.
+        if topic in self._callbacks:
+            self._dispatch[topic] = self._make_dispatch(topic)
+        else:
+            self._dispatch.pop(topic, None)
 
     def register_topics(self, topics: Dict[str, Callable]):
         """Register a number of message definitions for multiple topics.
@@ -115,8 +157,12 @@ class Pigeon:
         Args:
             topics: A mapping of topics to Pydantic model message definitions.
         """
-        for topic in topics.items():
-            self.register_topic(*topic)
+        # Many topics often share a message definition, so hash each one once.
+        hashes = {
+            msg_class: get_message_hash(msg_class) for msg_class in set(topics.values())
+        }
+        for topic, msg_class in topics.items():
+            self._set_topic(topic, msg_class, hashes[msg_class])
 
     def connect(
         self,
@@ -130,13 +176,14 @@ class Pigeon:
         Args:
             username (str, optional): The username to authenticate with. Defaults to None.
             password (str, optional): The password to authenticate with. Defaults to None.
-            retry_limit (int, optional): Number of times to attempt connection
+            retry_limit (int, optional): Number of times to attempt connection.
+                Attempts are separated by an exponentially increasing delay.
 
         Raises:
             stomp.exception.ConnectFailedException: If the connection to the server fails.
         """
-        retries = 0
-        while retries < retry_limit:
+        error = None
+        for retries in range(retry_limit):
             try:
                 self._connection.connect(
                     username=username, passcode=password, wait=True
@@ -145,12 +192,13 @@ class Pigeon:
                 break
             except stomp.exception.ConnectFailedException as e:
                 self._logger.error(f"Connection failed: {e}. Attempting to reconnect.")
-                retries += 1
-                time.sleep(1)
-                if retries == retry_limit:
-                    raise stomp.exception.ConnectFailedException(
-                        f"Could not connect to server: {e}"
-                    ) from e
+                error = e
+                if retries + 1 < retry_limit:
+                    time.sleep(min(0.1 * 2**retries, 5.0) + random.random() * 0.05)
+        else:
+            raise stomp.exception.ConnectFailedException(
+                f"Could not connect to server: {error}"
+            ) from error
 
         self.subscribe("&_request_state", self._update_state)
         self._announce()
@@ -167,59 +215,126 @@ class Pigeon:
             exceptions.NoSuchTopicException: If the specified topic is not defined.
         """
         self._ensure_topic_exists(topic)
-        serialized_data = self._topics[topic](**data).serialize()
+        serialized_data = self._topics[topic][0](**data).serialize()
 
-        headers = dict(
-            source=self._name,
-            service=self._service,
-            hostname=self._hostname,
-            pid=self._pid,
-            hash=self._hashes[topic],
-            sent_at=get_str_time_ms(),
-        )
+        headers = {**self._header_protos[topic], "sent_at": get_str_time_ms()}
         self._connection.send(destination=topic, body=serialized_data, headers=headers)
-        self._logger.debug(f"Sent data to {topic}: {serialized_data}")
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(f"Sent data to {topic}: {serialized_data}")
 
     def _ensure_topic_exists(self, topic: str):
-        if topic not in self._topics or topic not in self._hashes:
+        if topic not in self._topics:
             raise exceptions.NoSuchTopicException(f"Topic {topic} not defined.")
 
-    def _handle_message(self, message_frame: Frame):
-        topic = message_frame.headers["subscription"]
-        if topic not in self._topics or topic not in self._hashes:
-            self._logger.warning(
-                f"Received a message on an unregistered topic: {topic}"
-            )
-            return
-        if message_frame.headers.get("hash") != self._hashes.get(topic):
-            self._logger.warning(
-                f"Received a message on topic '{topic}' with an incorrect hash: {message_frame.headers.get('hash')}. Expected: {self._hashes.get(topic)}"
-            )
-            return
-        try:
-            message_data = self._topics[topic].deserialize(message_frame.body)
-        except ValidationError as e:
-            self._logger.warning(
-                f"Failed to deserialize message on topic '{topic}' with error:\n{e}"
-            )
-            return
+    def _make_dispatch(self, topic: str) -> Callable[[dict, str], None]:
+        msg_class, expected_hash = self._topics[topic]
         callback = self._callbacks.get(topic)
-        if callback is None:
-            self._logger.warning(
-                f"No callback for message received on topic '{topic}'."
-            )
+        adapter = make_adapter(callback) if callback is not None else None
+
+        def dispatch(headers: dict, body: str):
+            received_hash = headers.get("hash")
+            if received_hash != expected_hash:
+                self._logger.warning(
+                    f"Received a message on topic '{topic}' with an incorrect hash: {received_hash}. Expected: {expected_hash}"
+                )
+                return
+            try:
+                message_data = msg_class.deserialize(body)
+            except ValidationError as e:
+                self._logger.warning(
+                    f"Failed to deserialize message on topic '{topic}' with error:\n{e}"
+                )
+                return
+            if adapter is None:
+                self._logger.warning(
+                    f"No callback for message received on topic '{topic}'."
+                )
+                return
+            try:
+                adapter(message_data, topic, headers)
+            except exceptions.SignatureException as e:
+                self._logger.warning(
+                    f"Callback signature for topic '{topic}' not acceptable. Call failed with error:\n{e}"
+                )
+            except Exception as e:
+                self._logger.warning(
+                    f"Callback for topic '{topic}' failed with error:", exc_info=True
+                )
+
+        return dispatch
+
+    def _start_workers(self):
+        with self._workers_lock:
+            if self._workers:
+                return
+            for i, message_queue in enumerate(self._queues):
+                worker = threading.Thread(
+                    target=self._process_messages,
+                    args=(message_queue,),
+                    name=f"{self._service}-worker-{i}",
+                    daemon=True,
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _stop_workers(self, timeout: float):
+        with self._workers_lock:
+            workers, self._workers = self._workers, []
+        if not workers:
             return
-        try:
-            call_with_correct_args(callback, message_data, topic, message_frame.headers)
-        except exceptions.SignatureException as e:
-            self._logger.warning(
-                f"Callback signature for topic '{topic}' not acceptable. Call failed with error:\n{e}"
-            )
-        except Exception as e:
+        for message_queue in self._queues:
+            message_queue.put(None)
+        # A callback may disconnect, in which case its own worker cannot be
+        # joined. It exits once it reaches the sentinel.
+        current = threading.current_thread()
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            if worker is not current:
+                worker.join(max(deadline - time.monotonic(), 0))
+        if any(worker.is_alive() for worker in workers if worker is not current):
             self._logger.warning(
-                f"Callback for topic '{topic}' failed with error:", exc_info=True
+                f"Received messages were not all handled within {timeout} seconds."
             )
 
+    def _process_messages(self, message_queue: queue.Queue):
+        while True:
+            message_frame = message_queue.get()
+            if message_frame is None:
+                message_queue.task_done()
+                return
+            try:
+                self._handle_message(message_frame)
+            except Exception:
+                self._logger.exception("Failed to handle message.")
+            finally:
+                message_queue.task_done()
+
+    def _enqueue_message(self, message_frame: Frame):
+        # The STOMP receiver thread only queues frames so that slow
+        # deserialization or callbacks do not delay heartbeats. Each topic is
+        # always handled by the same worker to keep its messages in order.
+        if self._draining:
+            return
+        if not self._workers:
+            self._start_workers()
+        topic = message_frame.headers.get("subscription")
+        self._queues[hash(topic) % len(self._queues)].put(message_frame)
+
+    def _handle_message(self, message_frame: Frame):
+        headers = message_frame.headers
+        topic = headers.get("subscription")
+        dispatch = self._dispatch.get(topic)
+        if dispatch is None:
+            if topic not in self._topics:
+                self._logger.warning(
+                    f"Received a message on an unregistered topic: {topic}"
+                )
+                return
+            # Not subscribed, so there is no callback. The closure is not
+            # cached, as subscribe may be storing one at the same time.
+            dispatch = self._make_dispatch(topic)
+        dispatch(headers, message_frame.body)
+
     def subscribe(self, topic: str, callback: Callable, send_update=True):
         """
         Subscribes to a topic and associates a callback function to handle incoming messages.
@@ -238,6 +353,7 @@ class Pigeon:
         if topic not in self._callbacks:
             self._connection.subscribe(destination=topic, id=topic)
         self._callbacks[topic] = callback
+        self._dispatch[topic] = self._make_dispatch(topic)
         self._logger.info(f"Subscribed to {topic} with {callback}.")
         if send_update:
             self._update_state()
@@ -269,13 +385,30 @@ class Pigeon:
         self._connection.unsubscribe(id=topic)
         self._logger.info(f"Unsubscribed from {topic}.")
         del self._callbacks[topic]
+        self._dispatch.pop(topic, None)
+
+    def disconnect(self, timeout: float = 5.0):
+        """Disconnect from the STOMP message broker.
+
+        Messages which have already been received are handled first, while
+        the connection is still open, so callbacks may still send messages.
+        Messages received after this is called are dropped. If this is
+        called from within a callback, messages queued behind it on the same
+        worker are handled after this returns.
 
-    def disconnect(self):
-        """Disconnect from the STOMP message broker."""
-        if self._connection.is_connected():
-            self._announce(connected=False)
-            self._connection.disconnect()
-            self._logger.info("Disconnected from STOMP server.")
+        Args:
+            timeout: The maximum time in seconds to wait for received messages
+                to be handled.
+        """
+        self._draining = True
+        try:
+            self._stop_workers(timeout)
+            if self._connection.is_connected():
+                self._announce(connected=False)
+                self._connection.disconnect()
+                self._logger.info("Disconnected from STOMP server.")
+        finally:
+            self._draining = False
 
 
 class TEMCommsListener(stomp.ConnectionListener):
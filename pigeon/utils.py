@@ -1,14 +1,34 @@
 import logging
 import inspect
-from copy import copy
+from functools import lru_cache
 import hashlib
-from typing import Callable
+from typing import Callable, NamedTuple
 import os
-from logging_loki import LokiQueueHandler
-from multiprocessing import Queue
 
 from .exceptions import SignatureException
 
+_VAR_POSITIONAL = inspect.Parameter.VAR_POSITIONAL
+_VAR_KEYWORD = inspect.Parameter.VAR_KEYWORD
+_EMPTY = inspect.Parameter.empty
+
+
+@lru_cache(maxsize=None)
+def _get_loki_handler(url: str, tags: tuple, auth: tuple, version: str):
+    from logging_loki import LokiQueueHandler
+    from multiprocessing import Queue
+
+    loki_handler = LokiQueueHandler(
+        Queue(-1),
+        url=url,
+        tags=dict(tags) if tags is not None else None,
+        auth=auth,
+        version=version,
+    )
+    loki_formatter = logging.Formatter("%(message)s")
+    loki_handler.setFormatter(loki_formatter)
+    loki_handler.setLevel(logging.DEBUG)
+    return loki_handler
+
 
 def setup_logging(logger_name: str, log_level: int = logging.INFO):
     logger = logging.getLogger(logger_name)
@@ -22,12 +42,13 @@ def setup_logging(logger_name: str, log_level: int = logging.INFO):
     logger.addHandler(stream_handler)
     if "LOKI_URL" in os.environ:
         logger.info("Initializing Loki log handler.")
-        loki_handler = LokiQueueHandler(
-            Queue(-1),
+        # The handler, with its queue and background thread, is shared by
+        # every logger using the same Loki configuration.
+        loki_handler = _get_loki_handler(
             url=os.environ.get("LOKI_URL"),
             tags=(
-                dict(
-                    [val.strip() for val in tag.split(":")]
+                tuple(
+                    tuple(val.strip() for val in tag.split(":"))
                     for tag in os.environ.get("LOKI_TAGS").split(",")
                 )
                 if "LOKI_TAGS" in os.environ
@@ -40,9 +61,6 @@ def setup_logging(logger_name: str, log_level: int = logging.INFO):
             ),
             version=os.environ.get("LOKI_VERSION", "1"),
         )
-        loki_formatter = logging.Formatter("%(message)s")
-        loki_handler.setFormatter(loki_formatter)
-        loki_handler.setLevel(logging.DEBUG)
         logger.addHandler(loki_handler)
     return logger
 
@@ -53,33 +71,100 @@ def get_message_hash(msg_cls: Callable):
     return hash.hexdigest()
 
 
-def call_with_correct_args(func, *args, **kwargs):
-    args = copy(args)
-    kwargs = copy(kwargs)
-    params = inspect.signature(func).parameters
-
-    if True not in [
-        param.kind == inspect._ParameterKind.VAR_POSITIONAL for param in params.values()
-    ]:
-        num_args = len(
-            [
-                None
-                for param in params.values()
-                if param.default == param.empty and param.kind != param.VAR_KEYWORD
-            ]
-        )
-        if num_args > len(args):
+class _Signature(NamedTuple):
+    has_varargs: bool
+    has_varkw: bool
+    num_required: int
+    allowed_kwargs: frozenset
+
+
+@lru_cache(maxsize=256)
+def _describe(func: Callable) -> _Signature:
+    has_varargs = False
+    has_varkw = False
+    num_required = 0
+    allowed_kwargs = set()
+    for name, param in inspect.signature(func).parameters.items():
+        if param.kind is _VAR_POSITIONAL:
+            has_varargs = True
+        elif param.kind is _VAR_KEYWORD:
+            has_varkw = True
+            continue
+        if param.default is _EMPTY:
+            num_required += 1
+        else:
+            allowed_kwargs.add(name)
+    return _Signature(has_varargs, has_varkw, num_required, frozenset(allowed_kwargs))
+
+
+def _signature_of(func: Callable) -> _Signature:
+    try:
+        return _describe(func)
+    except TypeError:
+        # Unhashable callables cannot be cached.
+        return _describe.__wrapped__(func)
+
+
+def _bind_args(func: Callable, signature: _Signature, args: tuple, kwargs: dict):
+    # kwargs is filtered in place. Callers pass the dict created by unpacking
+    # their own **kwargs, so it is never shared.
+    if not signature.has_varargs:
+        if signature.num_required > len(args):
             raise SignatureException(
-                f"Function '{func}' requires {num_args} positional arguments, but only {len(args)} are available."
+                f"Function '{func}' requires {signature.num_required} positional arguments, but only {len(args)} are available."
             )
-        args = args[:num_args]
+        args = args[: signature.num_required]
+
+    if kwargs and not signature.has_varkw:
+        for key in [key for key in kwargs if key not in signature.allowed_kwargs]:
+            del kwargs[key]
 
-    if True not in [
-        param.kind == inspect._ParameterKind.VAR_KEYWORD for param in params.values()
-    ]:
-        allowed_keys = [key for key, val in params.items() if val.default != val.empty]
-        for key in list(kwargs.keys()):
-            if key not in allowed_keys:
-                del kwargs[key]
+    return args, kwargs
 
+
+def call_with_correct_args(func, *args, **kwargs):
+    """Call a function with only the arguments it accepts.
+
+    Extra positional arguments are dropped, as are keyword arguments the
+    function does not define. The keyword argument dict is filtered in
+    place rather than copied.
+
+    Args:
+        func: The function to call.
+        *args: Positional arguments, passed in order.
+        **kwargs: Keyword arguments, passed if accepted.
+
+    Returns:
+        The return value of the function.
+
+    Raises:
+        SignatureException: If the function requires more positional
+            arguments than are available.
+    """
+    args, kwargs = _bind_args(func, _signature_of(func), args, kwargs)
     return func(*args, **kwargs)
+
+
+def make_adapter(func: Callable) -> Callable:
+    """Wrap a function so that it is only called with the arguments it accepts.
+
+    This is equivalent to using call_with_correct_args, but the signature of
+    the function is inspected once, when the adapter is created.
+
+    Args:
+        func: The function to wrap.
+
+    Returns:
+        A callable accepting any arguments.
+    """
+    # The adapter holds the signature itself, so the shared cache, which would
+    # keep func alive, is bypassed.
+    signature = _describe.__wrapped__(func)
+    if signature.has_varargs and signature.has_varkw:
+        return func
+
+    def adapter(*args, **kwargs):
+        args, kwargs = _bind_args(func, signature, args, kwargs)
+        return func(*args, **kwargs)
+
+    return adapter
@@ -0,0 +1,23 @@
+"""Optionally compile the message handling hot paths with Cython.
+
+Set PIGEON_CYTHONIZE=1 when building to compile pigeon/client.py and
+pigeon/utils.py into extension modules. Otherwise, the package is built
+as pure Python. All other metadata lives in pyproject.toml.
+"""
+
+import os
+
+from setuptools import setup
+
+ext_modules = []
+if os.environ.get("PIGEON_CYTHONIZE"):
+    from Cython.Build import cythonize
+
+    ext_modules = cythonize(
+        ["pigeon/client.py", "pigeon/utils.py"],
+        # Keep the runtime behavior of the pure Python modules, which accept
+        # any mapping for headers and duck typed message bodies.
+        compiler_directives={"language_level": 3, "annotation_typing": False},
+    )
+
+setup(ext_modules=ext_modules)
@@ -1,7 +1,9 @@
 import pytest
+import threading
+import time
 from unittest.mock import MagicMock, patch
 from stomp.exception import ConnectFailedException
-from pigeon.client import Pigeon
+from pigeon.client import Pigeon, get_str_time_ms, _discover_topics
 from pigeon.exceptions import NoSuchTopicException
 from pigeon import BaseMessage
 
@@ -25,6 +27,36 @@ def pigeon_client():
         yield client
 
 
+def test_register_topics_hashes_once(pigeon_client, mocker):
+    mock_hash = mocker.patch("pigeon.client.get_message_hash", return_value="abc")
+
+    pigeon_client.register_topics({"topic3": MockMessage, "topic4": MockMessage})
+
+    mock_hash.assert_called_once_with(MockMessage)
+    assert pigeon_client._topics["topic3"] == (MockMessage, "abc")
+    assert pigeon_client._topics["topic4"] == (MockMessage, "abc")
+
+
+def test_load_topics_cached(mocker):
+    entrypoint = mocker.MagicMock()
+    entrypoint.load.return_value = {"topic1": MockMessage}
+    mock_entry_points = mocker.patch(
+        "pigeon.client.entry_points", return_value=[entrypoint]
+    )
+    _discover_topics.cache_clear()
+
+    try:
+        first = Pigeon("test", logger=mocker.MagicMock())
+        second = Pigeon("test", logger=mocker.MagicMock())
+    finally:
+        _discover_topics.cache_clear()
+
+    mock_entry_points.assert_called_once_with(group="pigeon.msgs")
+    entrypoint.load.assert_called_once()
+    assert first._topics["topic1"][0] is MockMessage
+    assert second._topics["topic1"][0] is MockMessage
+
+
 @pytest.mark.parametrize(
     "username, password, expected_log",
     [
@@ -81,6 +113,22 @@ def test_connect_failure(pigeon_client, username, password):
     assert pigeon_client._logger.error.call_count == retry_limit
 
 
+def test_connect_backoff(pigeon_client, mocker):
+    pigeon_client._connection.connect = MagicMock(
+        side_effect=ConnectFailedException("Connection failed")
+    )
+    mock_sleep = mocker.patch("pigeon.client.time.sleep")
+    mocker.patch("pigeon.client.random.random", return_value=0)
+
+    with pytest.raises(ConnectFailedException):
+        pigeon_client.connect(retry_limit=8)
+
+    assert pigeon_client._connection.connect.call_count == 8
+    assert [call.args[0] for call in mock_sleep.mock_calls] == pytest.approx(
+        [0.1, 0.2, 0.4, 0.8, 1.6, 3.2, 5.0]
+    )
+
+
 @pytest.mark.parametrize(
     "topic, data, expected_serialized_data",
     [
@@ -94,12 +142,12 @@ def test_send(pigeon_client, topic, data, expected_serialized_data):
         "service": "test",
         "hostname": pigeon_client._hostname,
         "pid": pigeon_client._pid,
-        "hash": pigeon_client._hashes["topic1"],
+        "hash": pigeon_client._topics["topic1"][1],
         "sent_at": "1",
     }
     # Arrange
-    with patch("pigeon.client.time.time_ns", lambda: 1e6):
-        pigeon_client._topics[topic] = MockMessage
+    with patch("pigeon.client.time.time_ns", lambda: 1_000_000):
+        pigeon_client.register_topic(topic, MockMessage)
         pigeon_client._connection.send = MagicMock()
 
         # Act
@@ -114,6 +162,40 @@ def test_send(pigeon_client, topic, data, expected_serialized_data):
         )
 
 
+def test_get_str_time_ms():
+    with patch("pigeon.client.time.time_ns", lambda: 1_234_567_890_123_456_789):
+        assert get_str_time_ms() == "1234567890123"
+        assert get_str_time_ms() == "1234567890123"
+    with patch("pigeon.client.time.time_ns", lambda: 1_234_567_890_124_000_000):
+        assert get_str_time_ms() == "1234567890124"
+
+
+def test_send_reregistered_topic(pigeon_client):
+    class OtherMessage(BaseMessage):
+        field1: str
+        field2: int = 0
+
+    pigeon_client._connection.send = MagicMock()
+
+    pigeon_client.send("topic1", field1="value")
+    pigeon_client.register_topic("topic1", OtherMessage)
+    pigeon_client.send("topic1", field1="value")
+
+    first, second = pigeon_client._connection.send.mock_calls
+    assert first.kwargs["headers"]["hash"] != second.kwargs["headers"]["hash"]
+    assert second.kwargs["headers"]["hash"] == pigeon_client._topics["topic1"][1]
+
+
+def test_send_debug_disabled(pigeon_client):
+    pigeon_client._connection.send = MagicMock()
+    pigeon_client._logger.isEnabledFor.return_value = False
+
+    pigeon_client.send("topic1", field1="value")
+
+    pigeon_client._connection.send.assert_called_once()
+    pigeon_client._logger.debug.assert_not_called()
+
+
 @pytest.mark.parametrize(
     "topic, data",
     [
@@ -136,7 +218,7 @@ def test_send_no_such_topic(pigeon_client, topic, data):
 )
 def test_subscribe(pigeon_client, topic, callback_name, expected_log):
     # Arrange
-    pigeon_client._topics[topic] = MockMessage
+    pigeon_client.register_topic(topic, MockMessage)
     callback = MagicMock(__name__=callback_name)
     pigeon_client._connection.subscribe = MagicMock()
     pigeon_client._update_state = MagicMock()
@@ -229,3 +311,110 @@ def test_disconnect(pigeon_client):
     pigeon_client._connection.disconnect.assert_called_once()
     pigeon_client._logger.info.assert_called_with("Disconnected from STOMP server.")
     pigeon_client._announce.assert_called_with(connected=False)
+
+
+def test_received_messages_queued(pigeon_client):
+    pigeon_client._handle_message = MagicMock()
+    frame = MagicMock(headers={"subscription": "topic1"})
+
+    pigeon_client._connection.get_listener("listener").on_message(frame)
+    for message_queue in pigeon_client._queues:
+        message_queue.join()
+
+    pigeon_client._handle_message.assert_called_once_with(frame)
+    assert "received_at" in frame.headers
+
+
+def test_received_messages_ordered():
+    with patch("pigeon.utils.setup_logging") as mock_logging:
+        client = Pigeon(
+            "test", logger=mock_logging.Logger(), load_topics=False, workers=4
+        )
+    handled = []
+    client._handle_message = lambda frame: handled.append(frame)
+    frames = [MagicMock(headers={"subscription": f"topic{i % 3}"}) for i in range(30)]
+
+    for frame in frames:
+        client._enqueue_message(frame)
+    for message_queue in client._queues:
+        message_queue.join()
+
+    assert len(client._workers) == 4
+    for topic in ("topic0", "topic1", "topic2"):
+        received = [f for f in handled if f.headers["subscription"] == topic]
+        sent = [f for f in frames if f.headers["subscription"] == topic]
+        assert received == sent
+
+
+def test_disconnect_stops_workers(pigeon_client):
+    handled = []
+
+    def handle_message(frame):
+        time.sleep(0.01)
+        handled.append(frame)
+
+    pigeon_client._connection.is_connected = MagicMock(return_value=False)
+    pigeon_client._handle_message = handle_message
+    frames = [MagicMock(headers={"subscription": "topic1"}) for _ in range(5)]
+    for frame in frames:
+        pigeon_client._enqueue_message(frame)
+    workers = list(pigeon_client._workers)
+
+    pigeon_client.disconnect()
+
+    assert handled == frames
+    assert pigeon_client._workers == []
+    assert not any(worker.is_alive() for worker in workers)
+
+
+def test_disconnect_drains_before_closing(pigeon_client):
+    events = []
+    pigeon_client._connection.is_connected = MagicMock(return_value=True)
+    pigeon_client._connection.disconnect = lambda: events.append("disconnect")
+    pigeon_client._announce = MagicMock()
+    pigeon_client._handle_message = lambda frame: events.append(frame)
+    frame = MagicMock(headers={"subscription": "topic1"})
+    pigeon_client._enqueue_message(frame)
+
+    pigeon_client.disconnect()
+
+    assert events == [frame, "disconnect"]
+
+
+def test_disconnect_timeout(pigeon_client):
+    release = threading.Event()
+    pigeon_client._connection.is_connected = MagicMock(return_value=False)
+    pigeon_client._handle_message = lambda frame: release.wait(5)
+    pigeon_client._enqueue_message(MagicMock(headers={"subscription": "topic1"}))
+
+    start = time.monotonic()
+    pigeon_client.disconnect(timeout=0.1)
+    elapsed = time.monotonic() - start
+    release.set()
+
+    assert elapsed < 1
+    pigeon_client._logger.warning.assert_called_with(
+        "Received messages were not all handled within 0.1 seconds."
+    )
+
+
+def test_disconnect_drops_new_messages(pigeon_client):
+    handled = []
+    first = MagicMock(headers={"subscription": "topic1"})
+    second = MagicMock(headers={"subscription": "topic1"})
+    pigeon_client._connection.is_connected = MagicMock(return_value=False)
+
+    def handle_message(frame):
+        handled.append(frame)
+        if frame is first:
+            deadline = time.monotonic() + 5
+            while not pigeon_client._draining and time.monotonic() < deadline:
+                time.sleep(0.01)
+            pigeon_client._enqueue_message(second)
+
+    pigeon_client._handle_message = handle_message
+    pigeon_client._enqueue_message(first)
+    pigeon_client.disconnect()
+
+    assert handled == [first]
+    assert all(message_queue.empty() for message_queue in pigeon_client._queues)
@@ -1,3 +1,4 @@
+import threading
 import pytest
 from unittest.mock import MagicMock, patch
 from pigeon.client import Pigeon
@@ -32,8 +33,7 @@ def test_one_arg(pigeon_client):
         assert msg == mock_message.deserialize()
 
     pigeon_client._connection = MagicMock()
-    pigeon_client._topics["test.msg"] = mock_message
-    pigeon_client._hashes["test.msg"] = "abcd"
+    pigeon_client._topics["test.msg"] = (mock_message, "abcd")
     pigeon_client.subscribe("test.msg", callback)
 
     pigeon_client._handle_message(mock_stomp_message)
@@ -54,8 +54,7 @@ def test_two_args(pigeon_client):
         assert topic == "test.msg"
 
     pigeon_client._connection = MagicMock()
-    pigeon_client._topics["test.msg"] = mock_message
-    pigeon_client._hashes["test.msg"] = "abcde"
+    pigeon_client._topics["test.msg"] = (mock_message, "abcde")
     pigeon_client.subscribe("test.msg", callback)
 
     pigeon_client._handle_message(mock_stomp_message)
@@ -77,8 +76,7 @@ def test_three_args(pigeon_client):
         assert headers == mock_stomp_message.headers
 
     pigeon_client._connection = MagicMock()
-    pigeon_client._topics["test.msg"] = mock_message
-    pigeon_client._hashes["test.msg"] = "123abc"
+    pigeon_client._topics["test.msg"] = (mock_message, "123abc")
     pigeon_client.subscribe("test.msg", callback)
 
     pigeon_client._handle_message(mock_stomp_message)
@@ -101,8 +99,7 @@ def test_var_args(pigeon_client):
         assert args[2] == mock_stomp_message.headers
 
     pigeon_client._connection = MagicMock()
-    pigeon_client._topics["test.msg"] = mock_message
-    pigeon_client._hashes["test.msg"] = "xyz987"
+    pigeon_client._topics["test.msg"] = (mock_message, "xyz987")
     pigeon_client.subscribe("test.msg", callback)
 
     pigeon_client._handle_message(mock_stomp_message)
@@ -125,8 +122,7 @@ def test_topic_does_not_exist(pigeon_client):
 def test_hash_mismatch(pigeon_client):
     mock_message = create_mock_message(subscription="test", hash="abc1")
 
-    pigeon_client._topics["test"] = None
-    pigeon_client._hashes["test"] = "abcd"
+    pigeon_client._topics["test"] = (None, "abcd")
     pigeon_client._handle_message(mock_message)
 
     pigeon_client._logger.warning.assert_called_with(
@@ -141,8 +137,7 @@ def test_validation_error(pigeon_client):
         title="Test", line_errors=[]
     )
 
-    pigeon_client._topics["test"] = mock_msg_def
-    pigeon_client._hashes["test"] = "abc123"
+    pigeon_client._topics["test"] = (mock_msg_def, "abc123")
     pigeon_client._handle_message(mock_message)
 
     pigeon_client._logger.warning.assert_called_with(
@@ -153,8 +148,7 @@ def test_validation_error(pigeon_client):
 def test_no_callback(pigeon_client):
     mock_message = create_mock_message(subscription="test", hash="4321")
 
-    pigeon_client._topics["test"] = MagicMock()
-    pigeon_client._hashes["test"] = "4321"
+    pigeon_client._topics["test"] = (MagicMock(), "4321")
     pigeon_client._handle_message(mock_message)
 
     pigeon_client._logger.warning.assert_called_with(
@@ -166,8 +160,7 @@ def test_bad_signature(pigeon_client):
     mock_message = create_mock_message(subscription="test", hash="lmnop")
     callback = lambda a, b, c, d: None
 
-    pigeon_client._topics["test"] = MagicMock()
-    pigeon_client._hashes["test"] = "lmnop"
+    pigeon_client._topics["test"] = (MagicMock(), "lmnop")
     pigeon_client.subscribe("test", callback)
     pigeon_client._handle_message(mock_message)
 
@@ -179,8 +172,7 @@ def test_bad_signature(pigeon_client):
 def test_callback_exception(pigeon_client):
     mock_message = create_mock_message(subscription="test", hash="987654321")
 
-    pigeon_client._topics["test"] = MagicMock()
-    pigeon_client._hashes["test"] = "987654321"
+    pigeon_client._topics["test"] = (MagicMock(), "987654321")
     pigeon_client.subscribe(
         "test", MagicMock(side_effect=RecursionError("This is a test error."))
     )
@@ -189,3 +181,63 @@ def test_callback_exception(pigeon_client):
     pigeon_client._logger.warning.assert_called_with(
         f"Callback for topic 'test' failed with error:", exc_info=True
     )
+
+
+def test_resubscribe(pigeon_client):
+    mock_message = create_mock_message(subscription="test", hash="abc")
+
+    pigeon_client._topics["test"] = (MagicMock(), "abc")
+    first_callback = MagicMock()
+    second_callback = MagicMock()
+    pigeon_client.subscribe("test", first_callback)
+    pigeon_client.subscribe("test", second_callback)
+    pigeon_client._handle_message(mock_message)
+
+    first_callback.assert_not_called()
+    second_callback.assert_called_once()
+
+
+def test_unsubscribed(pigeon_client):
+    mock_message = create_mock_message(subscription="test", hash="abc")
+
+    pigeon_client._topics["test"] = (MagicMock(), "abc")
+    callback = MagicMock()
+    pigeon_client.subscribe("test", callback)
+    pigeon_client.unsubscribe("test")
+    pigeon_client._handle_message(mock_message)
+
+    callback.assert_not_called()
+    pigeon_client._logger.warning.assert_called_with(
+        "No callback for message received on topic 'test'."
+    )
+
+
+def test_subscribe_while_handling(pigeon_client):
+    pigeon_client._topics["test"] = (MagicMock(), "abc")
+    building = threading.Event()
+    resume = threading.Event()
+    make_dispatch = pigeon_client._make_dispatch
+
+    def slow_make_dispatch(topic):
+        dispatch = make_dispatch(topic)
+        if threading.current_thread() is not threading.main_thread():
+            building.set()
+            resume.wait(5)
+        return dispatch
+
+    pigeon_client._make_dispatch = slow_make_dispatch
+    mock_message = create_mock_message(subscription="test", hash="abc")
+    handler = threading.Thread(
+        target=pigeon_client._handle_message, args=(mock_message,)
+    )
+    handler.start()
+    assert building.wait(5)
+
+    callback = MagicMock()
+    pigeon_client.subscribe("test", callback)
+    resume.set()
+    handler.join()
+    pigeon_client._handle_message(mock_message)
+    pigeon_client._handle_message(mock_message)
+
+    assert callback.call_count == 2
@@ -2,8 +2,11 @@ from pigeon import utils
 from pigeon.exceptions import SignatureException
 import pytest
 from unittest import mock
+import gc
 import os
 import logging
+import time
+import weakref
 from multiprocessing.queues import Queue
 
 
@@ -97,13 +100,67 @@ def test_both_var():
     )
 
 
+def test_signature_cached():
+    def test_func(a, b=2):
+        return a, b
+
+    utils.call_with_correct_args(test_func, 1, 2, b=3)
+    hits = utils._describe.cache_info().hits
+    assert utils.call_with_correct_args(test_func, 4, 5, b=6, c=7) == (4, 6)
+    assert utils._describe.cache_info().hits == hits + 1
+
+
+def test_unhashable_callable():
+    class Callback:
+        __hash__ = None
+
+        def __call__(self, a, b=2):
+            return a, b
+
+    assert utils.call_with_correct_args(Callback(), 1, 2, b=3) == (1, 3)
+
+
+def test_make_adapter():
+    def test_func(a, b, c=1):
+        return a, b, c
+
+    adapter = utils.make_adapter(test_func)
+    assert adapter(1, 2, 3, c=4, d=5) == (1, 2, 4)
+    with pytest.raises(SignatureException):
+        adapter(1)
+
+
+def test_make_adapter_uncached():
+    class Obj:
+        def cb(self, a):
+            return a
+
+    obj = Obj()
+    ref = weakref.ref(obj)
+    adapter = utils.make_adapter(obj.cb)
+    assert adapter(1, 2) == 1
+
+    del obj, adapter
+    gc.collect()
+    assert ref() is None
+
+
+def test_make_adapter_var():
+    def test_func(*args, **kwargs):
+        return args, kwargs
+
+    assert utils.make_adapter(test_func) is test_func
+
+
 def patch_env_vars(**vars):
     return mock.patch.dict(os.environ, **vars)
 
 
 @pytest.fixture
 def mock_loki(mocker):
-    return mocker.patch("pigeon.utils.LokiQueueHandler")
+    utils._get_loki_handler.cache_clear()
+    yield mocker.patch("logging_loki.LokiQueueHandler")
+    utils._get_loki_handler.cache_clear()
 
 
 def test_setup_logging_basic():
@@ -157,3 +214,38 @@ def test_setup_logging_loki(request, vars, tags, auth, mock_loki):
         assert len(logger.handlers) == 2
         assert isinstance(logger.handlers[0], logging.StreamHandler)
         assert logger.handlers[1] == mock_loki()
+
+
+def test_setup_logging_loki_shared(mock_loki):
+    with patch_env_vars(LOKI_URL="a.url"):
+        first = utils.setup_logging("loki_test_shared_one")
+        second = utils.setup_logging("loki_test_shared_two")
+    mock_loki.assert_called_once()
+    assert first.handlers[1] is second.handlers[1]
+
+
+def test_setup_logging_loki_routing(mocker):
+    mock_emit = mocker.patch("logging_loki.handlers.LokiHandler.emit", autospec=True)
+    utils._get_loki_handler.cache_clear()
+    try:
+        with patch_env_vars(LOKI_URL="http://a.test.url/"):
+            logger_a = utils.setup_logging("loki_test_routing_a")
+        with patch_env_vars(LOKI_URL="http://b.test.url/"):
+            logger_b = utils.setup_logging("loki_test_routing_b")
+        for i in range(20):
+            logger_a.info("a")
+            logger_b.info("b")
+        deadline = time.monotonic() + 5
+        while mock_emit.call_count < 40 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        utils._get_loki_handler.cache_clear()
+
+    urls = {"a": set(), "b": set()}
+    for call in mock_emit.mock_calls:
+        handler, record = call.args
+        urls[record.getMessage()].add(handler.emitter.url)
+    assert urls == {"a": {"http://a.test.url/"}, "b": {"http://b.test.url/"}}
+    assert mock_emit.call_count == 40
+    logger_a.handlers[1].listener.stop()
+    logger_b.handlers[1].listener.stop()